@@ -0,0 +1,126 @@
+import math
+import numpy as np
+
+from numba import njit, prange
+
+from constants import  (
+    cCallForwardPrice,
+    cCallSpotOption,
+    cPutForwardOption,
+    cPutCallParityoption,
+)
+
+_INV_SQRT2 = 1.0 / math.sqrt(2.0)
+
+@njit(inline="always", fastmath=True, cache=True)
+def _phi(x):
+    """
+    Standard normal cdf based on erfc, inlined into the kernel so the loop only contains vectorizable math.
+    erfc keeps full relative precision in the lower tail, where 1 + erf(x) cancels.
+    """
+    return 0.5 * math.erfc(-x * _INV_SQRT2)
+
+@njit(inline="always", fastmath=True, cache=True, error_model="numpy")
+def _bs_premium(spot_price, strike_price, time_to_maturity, risk_free_intrest_constant, asset_volatility, forward_stock_price):
+    """
+    Black and scholes premiums of a single option, inlined into the kernels so all intermediates stay in registers.
+    Equations are equal to :meth:`black_scholes.calculate_option_premium`, the normal cdf is evaluated using :func:`_phi`.
+    """
+    sqrt_time_to_maturity = math.sqrt(time_to_maturity)
+    vol_sqrt_time_to_maturity = asset_volatility * sqrt_time_to_maturity
+    discount_factor = math.exp(-risk_free_intrest_constant * time_to_maturity)
+
+    d1_spot = (math.log(spot_price/strike_price)+(risk_free_intrest_constant+0.5*asset_volatility*asset_volatility)*time_to_maturity)/vol_sqrt_time_to_maturity
+    d1_forward = (math.log(forward_stock_price/strike_price)+(0.5*asset_volatility*asset_volatility*time_to_maturity))/vol_sqrt_time_to_maturity
+    d2_spot = d1_spot - vol_sqrt_time_to_maturity
+    d2_forward = d1_forward - vol_sqrt_time_to_maturity
+
+    call_spot_price = discount_factor * (forward_stock_price*_phi(d1_spot)-strike_price*_phi(d2_spot))
+    call_forward_price = discount_factor * (forward_stock_price*_phi(d1_forward)-strike_price*_phi(d2_forward))
+    # put from the forward call by put-call parity, saves two cdf evaluations
+    put_price = call_forward_price - discount_factor * (forward_stock_price - strike_price)
+    put_call_parity = call_forward_price - spot_price + strike_price*discount_factor
+    return call_spot_price, call_forward_price, put_price, put_call_parity
+
+# error_model="numpy" drops the python ZeroDivisionError checks on every division, which otherwise block LLVM from
+# vectorizing the loop. With icc_rt (SVML) installed, numba then maps log/exp/sqrt to SIMD versions over the batch.
+@njit(parallel=True, fastmath=True, cache=True, error_model="numpy")
+def _bs_kernel(spot_price, strike_price, time_to_maturity, risk_free_intrest_constant, asset_volatility, forward_stock_price,
+               out_call_spot, out_call_forward, out_put, out_put_call_parity):
+    """
+    JIT compiled black and scholes kernel. Loops over every option in the batch and writes the results to the out arrays.
+    """
+    for i in prange(spot_price.shape[0]):
+        out_call_spot[i], out_call_forward[i], out_put[i], out_put_call_parity[i] = _bs_premium(
+            spot_price[i], strike_price[i], time_to_maturity[i], risk_free_intrest_constant[i], asset_volatility[i], forward_stock_price[i]
+        )
+
+@njit(parallel=True, fastmath=True, cache=True, error_model="numpy")
+def _bs_rates_kernel(spot_price, strike_price, time_to_maturity, risk_free_intrest, asset_volatility,
+                     out_call_spot, out_call_forward, out_put, out_put_call_parity):
+    """
+    Equal to :func:`_bs_kernel` but derives the risk free intrest constant and forward stock price per option inside the loop,
+    so only the five inputs are read and the four results are written without intermediate arrays.
+    """
+    for i in prange(spot_price.shape[0]):
+        risk_free_intrest_constant = math.log1p(risk_free_intrest[i])
+        forward_stock_price = spot_price[i] * math.exp(risk_free_intrest_constant * time_to_maturity[i])
+        out_call_spot[i], out_call_forward[i], out_put[i], out_put_call_parity[i] = _bs_premium(
+            spot_price[i], strike_price[i], time_to_maturity[i], risk_free_intrest_constant, asset_volatility[i], forward_stock_price
+        )
+
+def calculate_jit_option_premium(spot_price, strike_price, time_to_maturity, risk_free_intrest, asset_volatility, forward_stock_price=None) -> dict:
+    f"""
+    Price a batch of european options using the JIT compiled kernel. The first call compiles the kernel, which is cached on disk
+    for following processes. Parameters are equal to :func:`black_scholes.calculate_batch_option_premium`.
+
+    Returns
+    ---------------
+    black and schole results: dict of np.ndarray
+        {cCallSpotOption}: call_spot_price,
+        {cCallForwardPrice} : call_forward_price,
+        {cPutForwardOption}: put_price,
+        {cPutCallParityoption}: put_call_parity
+    """
+    spot_price, strike_price, time_to_maturity, risk_free_intrest, asset_volatility = np.broadcast_arrays(
+        *[np.ascontiguousarray(value, dtype=np.float64) for value in (spot_price, strike_price, time_to_maturity, risk_free_intrest, asset_volatility)]
+    )
+    if forward_stock_price is not None:
+        forward_stock_price = np.broadcast_to(np.asarray(forward_stock_price, dtype=np.float64), spot_price.shape)
+        return calculate_kernel_premium(spot_price, strike_price, time_to_maturity, np.log1p(risk_free_intrest), asset_volatility, forward_stock_price)
+
+    # numba requires contiguous 1-D arrays, broadcasted views are materialized here.
+    inputs = [np.ascontiguousarray(value).ravel() for value in (spot_price, strike_price, time_to_maturity, risk_free_intrest, asset_volatility)]
+    outputs = [np.empty_like(inputs[0]) for _ in range(4)]
+    _bs_rates_kernel(*inputs, *outputs)
+
+    return dict(zip([cCallSpotOption, cCallForwardPrice, cPutForwardOption, cPutCallParityoption], outputs))
+
+def calculate_kernel_premium(spot_price, strike_price, time_to_maturity, risk_free_intrest_constant, asset_volatility, forward_stock_price, dtype=np.float64) -> dict:
+    f"""
+    Run the JIT compiled kernel on already derived inputs of equal shape, e.g. the arrays of a :class:`black_scholes.BSPortfolio`.
+    Inputs are converted to dtype, numba compiles a separate specialization of the kernel for np.float32 on first use.
+    That specialization only reads and writes float32, the float64 constants promote the math itself to float64.
+
+    Returns
+    ---------------
+    black and schole results: dict of np.ndarray
+        {cCallSpotOption}: call_spot_price,
+        {cCallForwardPrice} : call_forward_price,
+        {cPutForwardOption}: put_price,
+        {cPutCallParityoption}: put_call_parity
+    """
+    # numba requires contiguous 1-D arrays of a single dtype, the inputs are converted here.
+    inputs = [np.ascontiguousarray(value, dtype=dtype).ravel() for value in (spot_price, strike_price, time_to_maturity, risk_free_intrest_constant, asset_volatility, forward_stock_price)]
+    # the kernel does not check bounds, every input is read for each option of spot_price
+    if len({value.shape for value in inputs}) != 1:
+        raise ValueError(f"All inputs should have the same number of options, got sizes {[value.shape[0] for value in inputs]}")
+    outputs = [np.empty_like(inputs[0]) for _ in range(4)]
+    _bs_kernel(*inputs, *outputs)
+
+    return {
+        cCallSpotOption: outputs[0],
+        cCallForwardPrice : outputs[1],
+        cPutForwardOption: outputs[2],
+        cPutCallParityoption: outputs[3],
+    }
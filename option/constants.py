@@ -1,6 +1,12 @@
+import calendar
+from datetime import datetime
+
 cDateFormat =  "%d-%m-%Y"
 cSpotPrice = 'Spot price'
 cCallForwardPrice = 'Call Forward price'
 cCallSpotOption = 'Call Spot price'
 cPutForwardOption = 'Put forward price'
-cPutCallParityoption = 'Put-call parity'
\ No newline at end of file
+cPutCallParityoption = 'Put-call parity'
+cArrayBackends = ['numpy', 'cupy', 'jax']
+# days in the current year, evaluated once per process to account for leap years in the time to maturity.
+cDaysInYear = 365 + calendar.isleap(datetime.now().year)
@@ -1,5 +1,11 @@
+import numpy as np
+from dataclasses import FrozenInstanceError
 from pytest import fixture, raises
-from black_scholes import black_scholes
+from black_scholes import black_scholes, BSInputs, BSPortfolio
+from scipy.special import ndtr
+from black_scholes_kernel import calculate_jit_option_premium, _phi
+from black_scholes import _phi as _scalar_phi
+from constants import cCallForwardPrice, cCallSpotOption, cPutForwardOption, cPutCallParityoption
 
 def test_add():
     assert 1+1 == 2
@@ -48,27 +54,37 @@ def test_time_to_maturity_leap_year():
 spot_price=19
 forward_price = 19.04367
 
-def test_spot_price_d1(default_scholes_class):
+@fixture()
+def default_precomputed(default_scholes_class):
+    """
+    Shared subexpressions as precomputed by calculate_option_premium.
+    """
+    vol_sqrt_time_to_maturity = default_scholes_class.asset_volatility * default_scholes_class.time_to_maturity ** 0.5
+    half_variance_time = 0.5 * default_scholes_class.asset_volatility ** 2 * default_scholes_class.time_to_maturity
+    return vol_sqrt_time_to_maturity, half_variance_time
+
+def test_spot_price_d1(default_scholes_class, default_precomputed):
     """
     Test if the d1 value of the spot price black Scholes formula matches with value from original excel file. Accuracy set based on excel data
     """
 
-    assert round(default_scholes_class.__calculate_spot_delta_one__(spot_price), 5) == 0.65953
+    assert round(default_scholes_class.__calculate_spot_delta_one__(spot_price, *default_precomputed), 5) == 0.65953
 
-def test_forward_price_d1(default_scholes_class):
+def test_forward_price_d1(default_scholes_class, default_precomputed):
     """
     Test if the d1 value of the spot price black Scholes formula matches with value from original excel file. Accuracy set based on excel data
     """
 
-    assert round(default_scholes_class.__calculate_forward_delta_one__(forward_price), 5) == 0.65953
+    assert round(default_scholes_class.__calculate_forward_delta_one__(forward_price, *default_precomputed), 5) == 0.65953
 
-def test_price_d2(default_scholes_class):
+def test_price_d2(default_scholes_class, default_precomputed):
     """
     Test if the d1 value of the spot price black Scholes formula matches with value from original excel file. Accuracy set based on excel data
     """
+    vol_sqrt_time_to_maturity = default_precomputed[0]
 
-    assert round(default_scholes_class.__calculate_delta_two__(d1 = default_scholes_class.__calculate_spot_delta_one__(spot_price)), 5) == 0.45600
-    assert round(default_scholes_class.__calculate_delta_two__(d1 = default_scholes_class.__calculate_forward_delta_one__(forward_price)), 5) == 0.45600
+    assert round(default_scholes_class.__calculate_delta_two__(d1 = default_scholes_class.__calculate_spot_delta_one__(spot_price, *default_precomputed), vol_sqrt_time_to_maturity = vol_sqrt_time_to_maturity), 5) == 0.45600
+    assert round(default_scholes_class.__calculate_delta_two__(d1 = default_scholes_class.__calculate_forward_delta_one__(forward_price, *default_precomputed), vol_sqrt_time_to_maturity = vol_sqrt_time_to_maturity), 5) == 0.45600
 
 def test_out_the_money(default_scholes_class):
     """
@@ -112,6 +128,35 @@ def test_at_the_money(default_scholes_class):
 
 ### test extremes
 
+def test_invalid_date_input():
+    """
+    Test if dates that match the format layout but are not valid dates are rejected
+    """
+    for trade_date in ["32-01-2023", "01-13-2023", "1a-01-2023", "2023-01-01"]:
+        with raises(ValueError):
+            black_scholes(
+                        spot_price= 19,
+                        strike_price= 17,
+                        trade_date= trade_date,
+                        expiry_date= "10-05-2024",
+                        asset_volatility= 0.3,
+                        european_option=True
+                    )
+
+def test_expiry_before_trade_date():
+    """
+    Test if an expiry date before the trade date is rejected
+    """
+    with raises(ValueError):
+        black_scholes(
+                    spot_price= 19,
+                    strike_price= 17,
+                    trade_date= "10-05-2023",
+                    expiry_date= "23-11-2022",
+                    asset_volatility= 0.3,
+                    european_option=True
+                )
+
 def test_missing_date_input():
     """
     Test extremely low inputs and missing dates
@@ -188,4 +233,179 @@ def test_non_european_option():
                     convenience_yield= 0,
                     european_option=False
                 ).calculate_option_premium()
-        
\ No newline at end of file
+
+def test_bs_inputs_matches_model(default_scholes_class):
+    """
+    Test if the unvalidated BSInputs derives the same values and premiums as the validated model.
+    """
+    inputs = BSInputs(
+                    spot_price= 19,
+                    strike_price= 17,
+                    trade_date= default_scholes_class.trade_date,
+                    expiry_date= default_scholes_class.expiry_date,
+                    risk_free_intrest= 0.005,
+                    asset_volatility= 0.3,
+                    european_option=True
+                )
+
+    assert inputs.time_to_maturity == default_scholes_class.time_to_maturity
+    assert inputs.risk_free_intrest_constant == default_scholes_class.risk_free_intrest_constant
+    outcomes = inputs.calculate_option_premium()
+    for key, value in default_scholes_class.calculate_option_premium().items():
+        assert round(outcomes[key], 10) == round(value, 10)
+
+def test_bs_inputs_validated(default_scholes_class):
+    """
+    Test if BSInputs.validated runs the pydantic validation and returns immutable inputs.
+    """
+    inputs = BSInputs.validated(
+                    spot_price= 19,
+                    strike_price= 17,
+                    trade_date= "23-11-2022",
+                    expiry_date= "10-05-2023",
+                    risk_free_intrest= 0.005,
+                    asset_volatility= 0.3,
+                    european_option=True
+                )
+
+    assert inputs == BSInputs.from_validated(default_scholes_class)
+    with raises(FrozenInstanceError):
+        inputs.strike_price = 20
+    with raises(Exception):
+        BSInputs.validated(spot_price= 19, strike_price= -17, trade_date= "23-11-2022", expiry_date= "10-05-2023")
+
+### test batch calculations
+
+def test_price_batch_matches_scalar(default_scholes_class):
+    """
+    Test if the vectorized batch pricing matches the scalar pricing for out, in and at the money options.
+    """
+    strike_prices = [17, 20, 19]
+    expected = []
+    for strike_price in strike_prices:
+        default_scholes_class.strike_price = strike_price
+        expected.append(default_scholes_class.calculate_option_premium())
+
+    for backend in ["numpy", "numba"]:
+        outcomes = black_scholes.price_batch(
+                        spot_price= np.full(3, default_scholes_class.spot_price),
+                        strike_price= np.array(strike_prices),
+                        time_to_maturity= np.full(3, default_scholes_class.time_to_maturity),
+                        risk_free_intrest= np.full(3, default_scholes_class.risk_free_intrest),
+                        asset_volatility= np.full(3, default_scholes_class.asset_volatility),
+                        backend=backend,
+                    )
+
+        for key, values in outcomes.items():
+            assert np.allclose(values, [outcome[key] for outcome in expected], rtol=1e-12)
+
+
+def test_jit_kernel_matches_batch():
+    """
+    Test if the JIT compiled kernel matches the ndtr based batch pricing, guarding against fastmath mis-compiles.
+    """
+    rng = np.random.default_rng(42)
+    size = 1000
+    parameters = {
+        "spot_price": rng.uniform(5, 50, size),
+        "strike_price": rng.uniform(5, 50, size),
+        "time_to_maturity": rng.uniform(0.05, 3, size),
+        "risk_free_intrest": rng.uniform(0.001, 0.1, size),
+        "asset_volatility": rng.uniform(0.05, 0.8, size),
+    }
+
+    expected = black_scholes.price_batch(**parameters)
+    forward_stock_price = parameters["spot_price"] * np.exp(np.log1p(parameters["risk_free_intrest"]) * parameters["time_to_maturity"])
+
+    for outcomes in [calculate_jit_option_premium(**parameters), calculate_jit_option_premium(**parameters, forward_stock_price=forward_stock_price)]:
+        for key, values in expected.items():
+            assert np.allclose(outcomes[key], values, rtol=1e-9, atol=1e-12)
+
+def test_jit_phi_matches_ndtr():
+    """
+    Test if the erfc based normal cdf of the JIT kernel and of scalar pricing match scipy's ndtr in relative terms, including the lower tail.
+    """
+    for x in np.linspace(-8, 8, 161):
+        assert abs(_phi(x) - ndtr(x)) / ndtr(x) < 1e-13
+        assert abs(_scalar_phi(x) - ndtr(x)) / ndtr(x) < 1e-13
+    assert _phi(-10.0) > 0
+
+def test_portfolio_matches_models(default_scholes_class):
+    """
+    Test if pricing a BSPortfolio matches pricing every model on its own.
+    """
+    models = [default_scholes_class.copy(update={"strike_price": strike_price}) for strike_price in [17, 20, 19]]
+    outcomes = BSPortfolio.from_models(models).price()
+
+    for i, model in enumerate(models):
+        for key, value in model.calculate_option_premium().items():
+            assert round(outcomes[key][i], 10) == round(value, 10)
+
+def test_portfolio_non_european_option(default_scholes_class):
+    models = [default_scholes_class, default_scholes_class.copy(update={"european_option": False})]
+    with raises(UserWarning):
+        BSPortfolio.from_models(models).price()
+
+def test_portfolio_numpy_backend(default_scholes_class):
+    """
+    Test if the numpy array backend gives the same portfolio prices as the JIT kernel.
+    """
+    portfolio = BSPortfolio.from_models([default_scholes_class.copy(update={"strike_price": strike_price}) for strike_price in [17, 20, 19]])
+    expected = portfolio.price()
+    outcomes = portfolio.price(backend="numpy")
+
+    for key, values in expected.items():
+        assert np.allclose(outcomes[key], values, rtol=1e-12)
+
+def test_portfolio_float32():
+    """
+    Test if float32 portfolio pricing stays close to the float64 reference for both the kernel and numpy. Calls within 1e-4 relative,
+    the puts derived by parity within 1e-6 of the spot price in absolute terms.
+    """
+    rng = np.random.default_rng(7)
+    size = 1000
+    spot_price = rng.uniform(5, 50, size)
+    time_to_maturity = rng.uniform(0.05, 3, size)
+    risk_free_intrest_constant = np.log1p(rng.uniform(0.001, 0.1, size))
+    portfolio = BSPortfolio(
+        spot_price=spot_price,
+        strike_price=spot_price * rng.uniform(0.8, 1.2, size),
+        time_to_maturity=time_to_maturity,
+        risk_free_intrest_constant=risk_free_intrest_constant,
+        forward_stock_price=spot_price * np.exp(risk_free_intrest_constant * time_to_maturity),
+        asset_volatility=rng.uniform(0.1, 0.8, size),
+        convenience_yield=np.zeros(size),
+        european_option=np.ones(size, dtype=np.bool_),
+    )
+    expected = portfolio.price()
+
+    for backend in ["numba", "numpy"]:
+        outcomes = portfolio.price(backend=backend, dtype=np.float32)
+        for key, values in expected.items():
+            assert outcomes[key].dtype == np.float32
+        for key in [cCallSpotOption, cCallForwardPrice]:
+            assert np.allclose(outcomes[key], expected[key], rtol=1e-4, atol=0)
+        for key in [cPutForwardOption, cPutCallParityoption]:
+            assert np.allclose(outcomes[key], expected[key], rtol=0, atol=1e-6 * spot_price)
+
+def test_portfolio_unequal_lengths():
+    """
+    Test if a portfolio with fields of different lengths is rejected instead of read out of bounds.
+    """
+    size = 5
+    with raises(ValueError):
+        BSPortfolio(
+            spot_price=np.full(size, 19.0),
+            strike_price=np.full(2, 17.0),
+            time_to_maturity=np.full(size, 0.5),
+            risk_free_intrest_constant=np.full(size, 0.005),
+            forward_stock_price=np.full(size, 19.05),
+            asset_volatility=np.full(size, 0.3),
+            convenience_yield=np.zeros(size),
+            european_option=np.ones(size, dtype=np.bool_),
+        )
+
+def test_unsupported_backend():
+    with raises(ValueError):
+        black_scholes.price_batch(spot_price=19, strike_price=17, time_to_maturity=0.5, risk_free_intrest=0.005, asset_volatility=0.3, backend="torch")
+
@@ -1,7 +1,12 @@
-import pandas as pd
-from value_at_risk import Value_at_risk
+import shutil
+import warnings
+import numpy as np
+from pathlib import Path
+from pytest import approx, raises
+from value_at_risk import Value_at_risk, Portofolio_asset, load_market_rates, _load_rates
+from value_at_risk import data as test_data
 
-test_data = pd.read_csv(r"value_at_risk\cyy_market_rates.csv", parse_dates=['date'], sep=";", infer_datetime_format="%d-%m-%Y")
+_RATES = Path(__file__).with_name("cyy_market_rates.csv")
 
 def test_default_fx_VaR():
     """ 
@@ -13,6 +18,100 @@ def test_default_fx_VaR():
 
     assert round(Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk()["SPOT Portfolio value VaR"], 6) == -13572.733792
 
+def test_time_horizon_fx_VaR():
+    """ 
+    Test VaR for multi day time horizons against the results of the original log shift implementation.
+    """
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":test_data[test_data.asset == 'ccy-1']}
+    test_asset_ccy2 = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  95891.51, "asset_market_rates":test_data[test_data.asset == 'ccy-2']}
+    test_portofolio = {"SPOT Portfolio value": [test_asset_ccy1, test_asset_ccy2]}
+
+    value_at_risk = Value_at_risk(portofolio = test_portofolio)
+    assert round(value_at_risk.calculate_value_at_risk(time_horizon=2)["SPOT Portfolio value VaR"], 6) == -34580.739908
+    assert round(value_at_risk.calculate_value_at_risk(time_horizon=10)["SPOT Portfolio value VaR"], 6) == -64115.176534
+
+def test_loaded_market_rates_fx_VaR():
+    """ 
+    Test if market rates from the cached loader give the same VaR as the raw market rates.
+    """
+    market_rates = load_market_rates(_RATES)
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":market_rates['ccy-1']}
+    test_asset_ccy2 = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  95891.51, "asset_market_rates":market_rates['ccy-2']}
+    test_portofolio = {"SPOT Portfolio value": [test_asset_ccy1, test_asset_ccy2]}
+
+    assert round(Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk()["SPOT Portfolio value VaR"], 6) == -13572.733792
+
+def test_float32_market_rates_fx_VaR():
+    """ 
+    Test if float32 stored market rates stay close to the float64 VaR.
+    """
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":test_data[test_data.asset == 'ccy-1']}
+    test_asset_ccy2 = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  95891.51, "asset_market_rates":test_data[test_data.asset == 'ccy-2']}
+    test_portofolio = {"SPOT Portfolio value": [test_asset_ccy1, test_asset_ccy2]}
+
+    assert approx(Value_at_risk(portofolio = test_portofolio, market_rates_dtype=np.float32).calculate_value_at_risk()["SPOT Portfolio value VaR"], rel=1e-6) == -13572.733792
+
+def test_disk_cached_market_rates(tmp_path):
+    """ 
+    Test if the opt-in on-disk cache is written, read back and replaced when it can not be read.
+    """
+    csv_path = tmp_path / _RATES.name
+    shutil.copy(_RATES, csv_path)
+    cache_path = tmp_path / f"{_RATES.name}.npz"
+
+    assert _load_rates(csv_path, disk_cache=True).equals(test_data)
+    assert cache_path.exists()
+    _load_rates.cache_clear()
+    assert _load_rates(csv_path, disk_cache=True).equals(test_data)
+
+    cache_path.write_bytes(cache_path.read_bytes()[:100])
+    _load_rates.cache_clear()
+    assert _load_rates(csv_path, disk_cache=True).equals(test_data)
+    assert load_market_rates(csv_path, disk_cache=True)['ccy-1'].equals(load_market_rates(_RATES)['ccy-1'])
+    with np.load(cache_path, allow_pickle=False) as columns:
+        assert len(columns['market_rate']) == len(test_data)
+    assert list(tmp_path.glob("*.tmp")) == []
+
+def test_mismatched_loaded_market_rates():
+    """ 
+    Test if market rates loaded for another asset are rejected.
+    """
+    market_rates = load_market_rates(_RATES)
+    with raises(ValueError):
+        Portofolio_asset(asset_name="ccy-1", risk_type="FX", asset_value=1, asset_market_rates=market_rates['ccy-2'])
+
+def test_string_market_rates_fx_VaR():
+    """ 
+    Test if decimal comma market rates given as strings are converted to the same VaR.
+    """
+    string_data = test_data.assign(market_rate=test_data.market_rate.map(lambda x: f"{x:.14f}".replace(".", ",")))
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":string_data[string_data.asset == 'ccy-1']}
+    test_asset_ccy2 = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  95891.51, "asset_market_rates":string_data[string_data.asset == 'ccy-2']}
+    test_portofolio = {"SPOT Portfolio value": [test_asset_ccy1, test_asset_ccy2]}
+
+    assert round(Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk()["SPOT Portfolio value VaR"], 6) == -13572.733792
+
+def test_time_horizon_exceeds_history():
+    """ 
+    Test if a time horizon longer than the market rate history is rejected.
+    """
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":test_data[test_data.asset == 'ccy-1']}
+    test_portofolio = {"SPOT Portfolio value": [test_asset_ccy1]}
+
+    with raises(UserWarning):
+        Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk(time_horizon=len(test_data))
+
+def test_invalid_time_horizon():
+    """ 
+    Test if time horizons that are not a positive integer are rejected.
+    """
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":test_data[test_data.asset == 'ccy-1']}
+    value_at_risk = Value_at_risk(portofolio = {"SPOT Portfolio value": [test_asset_ccy1]})
+
+    for time_horizon in [-1, 0, 1.5, True]:
+        with raises(ValueError):
+            value_at_risk.calculate_value_at_risk(time_horizon=time_horizon)
+
 def test_random_fx_VaR():
     """ 
     Test VaR as defined in intial excel.
@@ -34,6 +133,19 @@ def test_single_zero_value_fx_VaR():
 
     assert round(Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk()["SPOT Portfolio value VaR"], 6) ==  -46.258286 
 
+def test_zero_value_degenerate_rates_fx_VaR():
+    """ 
+    Test if degenerate market rates of an asset without value are ignored without warnings.
+    """
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":test_data[test_data.asset == 'ccy-1']}
+    test_asset_ccy2 = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  0, "asset_market_rates":test_data[test_data.asset == 'ccy-2'].assign(market_rate=0.0)}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = Value_at_risk(portofolio = {"SPOT Portfolio value": [test_asset_ccy1, test_asset_ccy2]}).calculate_value_at_risk()
+    expected = Value_at_risk(portofolio = {"SPOT Portfolio value": [test_asset_ccy1]}).calculate_value_at_risk()
+    assert result["SPOT Portfolio value VaR"] == expected["SPOT Portfolio value VaR"]
+
 def test_all_zero_value_fx_VaR():
     """ 
     Test VaR as defined in intial excel.
@@ -56,5 +168,68 @@ def test_multi_portofolio():
     test_portofolio = {"SPOT Portfolio value 1": [test_asset_ccy1, test_asset_ccy2],
                        "SPOT Portfolio value 2": [test_asset_ccy1, test_asset_ccy2]}
     
-    assert round(Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk()["SPOT Portfolio value 1 VaR"], 6) ==  -22416.741934
-    assert round(Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk()["SPOT Portfolio value 2 VaR"], 6) ==  -22416.741934 
\ No newline at end of file
+    result = Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk()
+    assert round(result["SPOT Portfolio value 1 VaR"], 6) ==  -22416.741934
+    assert round(result["SPOT Portfolio value 2 VaR"], 6) ==  -22416.741934
+
+def test_multi_portofolio_shared_assets():
+    """
+    Test if assets shared between portofolios are validated and stored once.
+    """
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  253084.81, "asset_market_rates":test_data[test_data.asset == 'ccy-1']}
+    test_asset_ccy2 = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  5891.51, "asset_market_rates":test_data[test_data.asset == 'ccy-2']}
+
+    test_portofolio = {"SPOT Portfolio value 1": [test_asset_ccy1, test_asset_ccy2],
+                       "SPOT Portfolio value 2": [test_asset_ccy1],
+                       "SPOT Portfolio value 3": [test_asset_ccy1, test_asset_ccy2]}
+
+    value_at_risk = Value_at_risk(portofolio = test_portofolio)
+    assert len(value_at_risk.asset_values) == 2
+    assert value_at_risk.portofolio["SPOT Portfolio value 1"][0] is value_at_risk.portofolio["SPOT Portfolio value 2"][0]
+
+    result = value_at_risk.calculate_value_at_risk()
+    assert round(result["SPOT Portfolio value 1 VaR"], 6) ==  -22416.741934
+    assert result["SPOT Portfolio value 1 VaR"] == result["SPOT Portfolio value 3 VaR"]
+    assert result["SPOT Portfolio value 1 VaR"] != result["SPOT Portfolio value 2 VaR"]
+
+def test_multi_portofolio_different_histories():
+    """
+    Test if the VaR of a portofolio does not depend on the market dates of assets in other portofolios or of assets without value.
+    """
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":test_data[test_data.asset == 'ccy-1']}
+    test_asset_ccy2 = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  95891.51, "asset_market_rates":test_data[test_data.asset == 'ccy-2']}
+    test_asset_ccy2_short = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  95891.51, "asset_market_rates":test_data[test_data.asset == 'ccy-2'].head(50)}
+    test_asset_ccy2_zero = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  0, "asset_market_rates":test_data[test_data.asset == 'ccy-2'].head(50)}
+
+    test_portofolio = {"SPOT Portfolio value 1": [test_asset_ccy1, test_asset_ccy2],
+                       "SPOT Portfolio value 2": [test_asset_ccy2_short],
+                       "SPOT Portfolio value 3": [test_asset_ccy1, test_asset_ccy2, test_asset_ccy2_zero]}
+
+    result = Value_at_risk(portofolio = test_portofolio).calculate_value_at_risk()
+    expected = Value_at_risk(portofolio = {"SPOT Portfolio value 2": [test_asset_ccy2_short]}).calculate_value_at_risk()
+    assert round(result["SPOT Portfolio value 1 VaR"], 6) == -13572.733792
+    assert round(result["SPOT Portfolio value 3 VaR"], 6) == -13572.733792
+    assert result["SPOT Portfolio value 2 VaR"] == expected["SPOT Portfolio value 2 VaR"]
+
+def test_non_overlapping_histories():
+    """
+    Test if assets whose histories share fewer than three scenario dates are rejected.
+    """
+    test_asset_ccy1 = {"asset_name":"ccy-1","risk_type": "FX","asset_value":  153084.81, "asset_market_rates":test_data[test_data.asset == 'ccy-1'].head(10)}
+    test_asset_ccy2_disjoint = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  95891.51, "asset_market_rates":test_data[test_data.asset == 'ccy-2'].tail(10)}
+    test_asset_ccy2_overlap = {"asset_name":"ccy-2","risk_type": "FX", "asset_value":  95891.51, "asset_market_rates":test_data[test_data.asset == 'ccy-2'].iloc[8:20]}
+
+    with raises(UserWarning):
+        Value_at_risk(portofolio = {"SPOT Portfolio value": [test_asset_ccy1, test_asset_ccy2_disjoint]}).calculate_value_at_risk()
+    with raises(UserWarning):
+        Value_at_risk(portofolio = {"SPOT Portfolio value": [test_asset_ccy1, test_asset_ccy2_overlap]}).calculate_value_at_risk()
+
+def test_invalid_asset():
+    """
+    Test if negative asset values and unsupported risk types are rejected on construction.
+    """
+    with raises(ValueError):
+        Portofolio_asset(asset_name="ccy-1", risk_type="FX", asset_value=-1, asset_market_rates=test_data[test_data.asset == 'ccy-1'])
+    with raises(UserWarning):
+        Portofolio_asset(asset_name="ccy-1", risk_type="IR", asset_value=1, asset_market_rates=test_data[test_data.asset == 'ccy-1'])
+
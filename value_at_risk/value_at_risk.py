@@ -1,17 +1,132 @@
+import os
+import tempfile
+import numpy as np
 import pandas as pd
-from math import log, sqrt, exp
-from pydantic import BaseModel, validator, root_validator, Field
+from pathlib import Path
+from functools import lru_cache, reduce
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
+from value_at_risk_kernel import calculate_kernel_profit_loss, calculate_kernel_value_at_risk
+
 #TODO can we expect that the date in data is always single day by order otherwise we need to validate that the date dif between rows is equal to time horizon? this would require calander work for weekends and other non trading days / missing days
 #TODO what risktypes do we expect next to FX, is IR still a factor in use. What factor uses the relative type?
 #TODO check potential mismatch of equations. Numbers check out but sensitivty seems to be ignored for the scenario calculations.
 #TODO check required precision
 #TODO ask for guideliness document for reference and validation.
 
-class Portofolio_asset(BaseModel):
+_RATES = Path(__file__).with_name("cyy_market_rates.csv")
+
+# set to 1 to let value_at_risk.data use the on-disk cache of :func:`_load_rates`
+cDiskCacheEnvironment = "VALUE_AT_RISK_DISK_CACHE"
+
+@lru_cache(maxsize=None)
+def _load_rates(path, disk_cache: bool=False) -> pd.DataFrame:
+    """
+    Load a ; separated market rates csv with date, asset and market_rate columns, with dates and decimal comma market rates converted.
+    The frame is cached per process and shared between callers, it should not be modified.
+
+    Parameters
+    ------------
+    path: str
+        path to the market rates csv.
+    disk_cache: bool
+        store the parsed columns next to the csv as a numpy .npz file and read them from there in following processes, as long as
+        the file is newer than the csv. The file is loaded without pickle, so it can not execute code. An unreadable file is ignored
+        and replaced.
+    """
+    path = str(path)
+    cache_path = f"{path}.npz"
+    if disk_cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        try:
+            with np.load(cache_path, allow_pickle=False) as columns:
+                return pd.DataFrame({
+                    'date': columns['date'],
+                    'asset': columns['asset'].astype(object),
+                    'market_rate': columns['market_rate'],
+                })
+        except Exception:
+            # truncated or written in another layout, parse the csv again
+            pass
+
+    df_market_rates = pd.read_csv(path, sep=";", decimal=",", parse_dates=['date'], dayfirst=True, dtype={'market_rate': np.float64})
+    if disk_cache:
+        _write_columns(df_market_rates, cache_path)
+    return df_market_rates
+
+def _write_columns(df: pd.DataFrame, path: str):
+    """
+    Write the columns of a frame as a numpy .npz file through a temporary file that replaces path at once, so concurrent readers
+    never see a partial file.
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    except OSError:
+        # read only location, the csv is parsed again in the next process
+        return
+    try:
+        with os.fdopen(fd, "wb") as cache_file:
+            np.savez(cache_file, **{column: df[column].to_numpy(dtype=str if column == 'asset' else None) for column in df.columns})
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def __getattr__(name):
+    """
+    Module attribute data holds the bundled market rates shared by all importers. The csv is only parsed when data is first used and
+    at most once per process, so importing the module does not depend on the file. Set the environment variable
+    VALUE_AT_RISK_DISK_CACHE=1 to keep the parsed rates in an on-disk cache next to the csv between processes.
+    """
+    if name == "data":
+        return _load_rates(_RATES, disk_cache=os.environ.get(cDiskCacheEnvironment) == "1")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@lru_cache(maxsize=None)
+def load_market_rates(path, disk_cache: bool=False) -> Dict[str, pd.DataFrame]:
+    """
+    Load a ; separated market rates csv with date, asset and market_rate columns once per path using :func:`_load_rates`,
+    after which the rates are split per asset.
+
+    Parameters
+    ------------
+    path: str
+        path to the market rates csv.
+    disk_cache: bool
+        keep the parsed csv in an on-disk cache next to the csv between processes, see :func:`_load_rates`.
+
+    Returns
+    -----------
+    market_rates: Dict[str, pd.DataFrame]
+        per asset name a float market_rate frame indexed by date in descending order, as expected by :class:`Portofolio_asset`.
+        The asset name is kept in the frame attrs. The frames are shared between callers and should not be modified.
+    """
+    df_market_rates = _load_rates(path, disk_cache=disk_cache)
+
+    market_rates = {}
+    for asset_name, df_asset in df_market_rates.groupby("asset"):
+        df_asset = df_asset.drop(columns="asset").sort_values("date", ascending=False).set_index('date')
+        df_asset.attrs["asset"] = asset_name
+        market_rates[asset_name] = df_asset
+    return market_rates
+
+def _is_normalized_market_rates(df_market_rates: pd.DataFrame) -> bool:
+    """
+    Cheap check if market rates are already in the validated layout of a single float market_rate column indexed by descending dates.
+    """
+    return (
+        list(df_market_rates.columns) == ['market_rate']
+        and isinstance(df_market_rates.index, pd.DatetimeIndex)
+        and df_market_rates['market_rate'].dtype == np.float64
+        and df_market_rates.index.is_monotonic_decreasing
+    )
+
+@dataclass(slots=True)
+class Portofolio_asset:
     """
-    Base modal for portofolio assets and their value validation. 
+    Portofolio asset and its value validation. Validation runs once on construction.
 
     Parameters
     ------------
@@ -23,30 +138,35 @@ class Portofolio_asset(BaseModel):
         the value of a specific asset as a float. asset_value >=0
     asset_market_rates
         asset market rates as a float. can be any real number
-    profit_loss_vector
-        profit loss vector calculated using the associated risk type.
     """
     asset_name: str
     risk_type: str
-    asset_value: float = Field(ge=0)
-    asset_market_rates: Optional[pd.DataFrame]
-    profit_loss_vector: Optional[pd.DataFrame]
-
-    class Config:
-        arbitrary_types_allowed = True # allows for use of dataframes
-    
-    @root_validator
-    def validate_market_rates(cls, values):
+    asset_value: float
+    asset_market_rates: Optional[pd.DataFrame] = None
+
+    def __post_init__(self):
+        self.validate_supported_risk_factors()
+        self.asset_value = float(self.asset_value)
+        if not self.asset_value >= 0:
+            raise ValueError(f"asset_value of {self.asset_name} must be greater or equal to 0, got {self.asset_value}")
+        self.validate_market_rates()
+
+    def validate_market_rates(self):
         """ 
         Validate dat the dataframe contains asset that has the same name as the asset_name, index is date. 
         For market rates, precision and float conversions are checked if market rates are provided non float.
         """
-        df_market_rates = values['asset_market_rates']
+        df_market_rates = self.asset_market_rates
+        # market rates from load_market_rates are already validated for the single asset named in their attrs
+        if _is_normalized_market_rates(df_market_rates):
+            if df_market_rates.attrs.get("asset") != self.asset_name:
+                raise ValueError(f"Asset market rates of {df_market_rates.attrs.get('asset')} do not belong to {self.asset_name}")
+            return
         if not set(['date', 'asset', 'market_rate']).issubset(df_market_rates.columns):
             raise ValueError(f"Asset market rates should contain, date, asset and market rate")
         else:
             #ensure only asset beloning to asset are added
-            mask_asset = df_market_rates["asset"] == values["asset_name"]
+            mask_asset = df_market_rates["asset"] == self.asset_name
             df_market_rates = df_market_rates[mask_asset].drop(columns="asset")
 
             #if dates are not a datetime, format as datetime
@@ -59,69 +179,148 @@ class Portofolio_asset(BaseModel):
             #Check if market rate is a float.
             if not 'float' in df_market_rates['market_rate'].dtypes.name.lower():
                 df_market_rates['market_rate'] = df_market_rates["market_rate"].str.replace(",", ".")
-                avg_float_lenght = df_market_rates['market_rate'].apply(lambda x: len(x)).sum() / len(df_market_rates['market_rate'])
+                avg_float_lenght = df_market_rates['market_rate'].str.len().to_numpy().sum() / len(df_market_rates['market_rate'])
                 # Check if values have the same precision
                 if avg_float_lenght != abs(avg_float_lenght):
                     raise UserWarning(f"Asset market rates contain different precisions, {set(avg_float_lenght)}, where found. this can lead to numerical inacurracies")
             df_market_rates['market_rate'] = pd.to_numeric(df_market_rates['market_rate'])
-            values["asset_market_rates"] = df_market_rates
+            df_market_rates.attrs["asset"] = self.asset_name
+            self.asset_market_rates = df_market_rates
 
-        return values
-    
-    @validator('risk_type')
-    def validate_supported_risk_factors(cls, field_value, values):
+    def validate_supported_risk_factors(self):
       supported_risk_vfactors = ['FX']
-      if not field_value in supported_risk_vfactors:
-            raise UserWarning(f"{field_value} not in {supported_risk_vfactors}")
-      return field_value
+      if not self.risk_type in supported_risk_vfactors:
+            raise UserWarning(f"{self.risk_type} not in {supported_risk_vfactors}")
 
-class Value_at_risk(BaseModel):
+@dataclass(slots=True)
+class Value_at_risk:
     """
     Calculates the value at risk for a given set of asset object(s).
 
     portofolio: Dict[str, List[assets]]
-        dictionaire containing portofolio name and a list of associated :class:`Portofolio_asset` objects
+        dictionaire containing portofolio name and a list of associated :class:`Portofolio_asset` objects,
+        or dictionaries with the :class:`Portofolio_asset` parameters.
+    market_rates_dtype: np.dtype
+        dtype used to store the stacked market rates, np.float64 by default. np.float32 halves the memory read by the VaR kernel
+        for long histories, the profit and loss is still accumulated in float64 so results only differ by the rounding of the stored rates.
+    market_dates: pd.DatetimeIndex
+        union of the dates of all assets with a value, descending. Derived on construction.
+    log_market_rates: np.ndarray
+        natural log of the market rates of all assets with a value, every asset on its own dates in descending order and stored after
+        each other. Computed once in float64 and stored as market_rates_dtype. Derived on construction.
+    market_rates_offsets: np.ndarray
+        start of the rates of every asset in log_market_rates, shape (n_assets + 1,). Assets without value have no rates.
+        Derived on construction.
+    market_date_columns: np.ndarray
+        position in market_dates of every rate in log_market_rates. Derived on construction.
+    asset_values: np.ndarray
+        value of every asset. Derived on construction.
+    portofolio_rows: Dict[str, np.ndarray]
+        asset numbers belonging to every portofolio. Derived on construction.
     """
 
     portofolio: Dict[str, List[Portofolio_asset]]
-      
-    def __calculate_profit_loss_vector__(self, asset, time_horizon: int=1):
+    market_rates_dtype: type = np.float64
+    market_dates: pd.DatetimeIndex = field(init=False, repr=False)
+    log_market_rates: np.ndarray = field(init=False, repr=False)
+    market_rates_offsets: np.ndarray = field(init=False, repr=False)
+    market_date_columns: np.ndarray = field(init=False, repr=False)
+    asset_values: np.ndarray = field(init=False, repr=False)
+    portofolio_rows: Dict[str, np.ndarray] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # the same asset dictionary in several portofolios is validated once and shares a single row in the market rates
+        validated_assets = {}
+        for assets in self.portofolio.values():
+            for asset in assets:
+                if not isinstance(asset, Portofolio_asset) and id(asset) not in validated_assets:
+                    validated_assets[id(asset)] = Portofolio_asset(**asset)
+        self.portofolio = {
+            portofolio_name: [asset if isinstance(asset, Portofolio_asset) else validated_assets[id(asset)] for asset in assets]
+            for portofolio_name, assets in self.portofolio.items()
+        }
+        self.__stack_market_rates__()
+
+    def __stack_market_rates__(self):
         """ 
-        Calculate the proft and loss vectors for a given asset given the assosiate risk type.
-        Method used is given in ING guidelines #TODO Specifify guidelines
+        Store the log market rates of all assets in one contiguous array, every asset on its own dates so its profit and loss does not
+        depend on the other assets. The position of every rate within the shared market dates is stored next to it, so the profit and loss
+        of the assets in a portofolio can be aligned on the dates they share. Every portofolio refers to its assets by number.
         """
-        
-        # Profit and loss vector using log shift
-        if asset.risk_type == 'FX':
-            asset_shift_vector = (asset.asset_market_rates / asset.asset_market_rates.shift(periods=-time_horizon)).dropna() # due to shift the n time horizon rows are NaN at the end. These are dropped as they are redundant and a risk for further calculations.
-            if asset_shift_vector.empty:
-                raise UserWarning(f"{asset.asset_name} has an empty shift vector. This happens when the time horizon exceeds history. Please reduce time horizon")
-            asset.profit_loss_vector = asset.asset_value * asset_shift_vector.apply(lambda x: exp(log(x)*sqrt(time_horizon))-1, axis=1)
+        assets = list({id(asset): asset for assets in self.portofolio.values() for asset in assets}.values())
+        asset_rows = {id(asset): row for row, asset in enumerate(assets)}
+        self.asset_values = np.array([asset.asset_value for asset in assets], dtype=np.float64)
 
-        return asset        
+        # assets without value have no profit and loss, their rates are not stored and do not add or remove dates
+        valued_assets = [asset for asset in assets if asset.asset_value != 0]
+        self.market_dates = reduce(pd.Index.union, [asset.asset_market_rates.index for asset in valued_assets], pd.DatetimeIndex([])).sort_values(ascending=False)
+        history_lengths = [len(asset.asset_market_rates) if asset.asset_value != 0 else 0 for asset in assets]
+        self.market_rates_offsets = np.concatenate([[0], np.cumsum(history_lengths)]).astype(np.intp)
 
-    def __calculate_value_at_risk__(self,assets: list, time_horizon: int=1) -> float:
+        # the log shift of every horizon is a difference of log rates, the log is only taken once per rate and only the logs are kept.
+        self.log_market_rates = np.empty(self.market_rates_offsets[-1], dtype=self.market_rates_dtype)
+        self.market_date_columns = np.empty(self.market_rates_offsets[-1], dtype=np.intp)
+        for row, asset in enumerate(assets):
+            if history_lengths[row] == 0:
+                continue
+            rates = slice(self.market_rates_offsets[row], self.market_rates_offsets[row + 1])
+            self.log_market_rates[rates] = np.log(asset.asset_market_rates['market_rate'].to_numpy(dtype=np.float64))
+            self.market_date_columns[rates] = self.market_dates.get_indexer(asset.asset_market_rates.index)
+
+        self.portofolio_rows = {
+            portofolio_name: np.array([asset_rows[id(asset)] for asset in assets], dtype=np.intp)
+            for portofolio_name, assets in self.portofolio.items()
+        }
+
+    def __calculate_profit_loss__(self, time_horizon: int=1):
         """ 
-        Calculate the proft and loss vectors for a given asset given the assosiate risk type.
+        Calculate the proft and loss vectors of every asset once using the log shift of the FX risk type, shared by all portofolios.
         Method used is given in ING guidelines #TODO Specifify guidelines
-        
+
         Parameters
         ------------
-        asset: class:`Portofolio_asset`
-            an object of :class:`Portofolio_asset` containing default attributes.
         time_horizon: int
             time steps for calculating profit and loss vectors.
+
+        Returns
+        -----------
+        profit_loss: np.ndarray
+            profit and loss of every asset on the market dates, shape (n_assets, n_dates).
+        has_profit_loss: np.ndarray
+            boolean mask of the market dates on which an asset has a profit and loss, shape (n_assets, n_dates).
+        """
+        return calculate_kernel_profit_loss(
+            self.log_market_rates, self.market_rates_offsets, self.market_date_columns, self.asset_values, len(self.market_dates), time_horizon
+        )
+
+    def __calculate_value_at_risk__(self, profit_loss: np.ndarray, has_profit_loss: np.ndarray, rows: np.ndarray, portofolio_name: str="") -> float:
+        """ 
+        Calculate the VaR of a portofolio from the profit and loss vectors of its assets, aligned on the dates they share.
+        
+        Parameters
+        ------------
+        profit_loss: np.ndarray
+            profit and loss of the assets as given by :meth:`__calculate_profit_loss__`.
+        has_profit_loss: np.ndarray
+            dates with a profit and loss of the assets as given by :meth:`__calculate_profit_loss__`.
+        rows: np.ndarray
+            asset numbers of the portofolio.
+        portofolio_name: str
+            name of the portofolio, used in the warning when its assets share fewer than three scenario dates.
         
         Returns
         -----------
         value_at_risk: float
             value of risk for the particular portofolio.    
         """
-        assets = [self.__calculate_profit_loss_vector__(asset=asset, time_horizon=time_horizon) for asset in assets]
-        total_profit_loss = pd.concat([asset.profit_loss_vector for asset in assets]).groupby('date').sum().sort_values(ascending=True)
-
-        return 0.4 * total_profit_loss[1] + 0.6 * total_profit_loss[2]
-
+        # assets without value have no profit and loss, they are left out of the kernel
+        rows = rows[self.asset_values[rows] != 0]
+        if len(rows) == 0:
+            return 0.0
+        value_at_risk, n_shared_dates = calculate_kernel_value_at_risk(profit_loss, has_profit_loss, rows)
+        if n_shared_dates < 3:
+            raise UserWarning(f"{portofolio_name} has {n_shared_dates} scenario dates shared by all its assets, at least 3 are required. This happens when the asset histories barely overlap or the time horizon exceeds history. Please reduce time horizon")
+        return value_at_risk
 
     def calculate_value_at_risk(self, time_horizon: int=1): #TODO ask, can FX and IR scneario's be calculated together in the asset pool. #TODO are other shift methods required?
         """
@@ -130,7 +329,26 @@ class Value_at_risk(BaseModel):
         Parameters
         ------------
         time_horizon: int
-            time steps for calculating profit and loss vectors.
+            time steps for calculating profit and loss vectors, an integer of at least 1.
         """
+        # the kernels do not check bounds, a time horizon below 1 would read outside the market rates of an asset
+        if isinstance(time_horizon, bool) or not isinstance(time_horizon, (int, np.integer)) or time_horizon < 1:
+            raise ValueError(f"time_horizon must be an integer of at least 1, got {time_horizon!r}")
+
+        short_assets = {
+            asset.asset_name for assets in self.portofolio.values() for asset in assets
+            if asset.asset_value != 0 and len(asset.asset_market_rates) <= time_horizon
+        }
+        if short_assets:
+            raise UserWarning(f"{', '.join(sorted(short_assets))} has an empty shift vector. This happens when the time horizon exceeds history. Please reduce time horizon")
+
+        # the profit and loss of every asset is calculated once, portofolios sum their rows of it
+        profit_loss, has_profit_loss = self.__calculate_profit_loss__(time_horizon=time_horizon)
+
+        # portofolios holding the same assets share their VaR, it is calculated once per set of rows
+        value_at_risk_cache = {}
+        for portofolio_name, rows in self.portofolio_rows.items():
+            if rows.tobytes() not in value_at_risk_cache:
+                value_at_risk_cache[rows.tobytes()] = self.__calculate_value_at_risk__(profit_loss=profit_loss, has_profit_loss=has_profit_loss, rows=rows, portofolio_name=portofolio_name)
 
-        return {f"{portofolio_name} VaR": self.__calculate_value_at_risk__(assets=assets, time_horizon=time_horizon) for portofolio_name, assets in self.portofolio.items()}
\ No newline at end of file
+        return {f"{portofolio_name} VaR": value_at_risk_cache[rows.tobytes()] for portofolio_name, rows in self.portofolio_rows.items()}
@@ -0,0 +1,107 @@
+import math
+import numpy as np
+
+from numba import njit, prange
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _profit_loss_kernel(log_market_rates, market_rates_offsets, market_date_columns, asset_values, n_dates, time_horizon):
+    """
+    JIT compiled FX profit and loss of every asset for every scenario date. The log shift of a scenario is the difference of two
+    precomputed log market rates of the same asset, so no log or division is done in the loop.
+
+    Parameters
+    ------------
+    log_market_rates: np.ndarray
+        natural log of the market rates of all assets stored after each other, every asset sorted descending on its own dates.
+        Either np.float64 or np.float32, float32 log rates are widened on load so all arithmetic is done in float64.
+    market_rates_offsets: np.ndarray
+        start of the rates of every asset in log_market_rates, shape (n_assets + 1,).
+    market_date_columns: np.ndarray
+        position of every rate within the n_dates market dates.
+    asset_values: np.ndarray
+        value of every asset, shape (n_assets,).
+    n_dates: int
+        number of market dates.
+    time_horizon: int
+        time steps for calculating profit and loss vectors.
+
+    Returns
+    -----------
+    profit_loss: np.ndarray
+        float64 profit and loss of shape (n_assets, n_dates), zero on dates without profit and loss.
+    has_profit_loss: np.ndarray
+        boolean mask of shape (n_assets, n_dates) of the dates on which an asset has a profit and loss.
+    """
+    n_assets = asset_values.shape[0]
+    sqrt_time_horizon = math.sqrt(time_horizon)
+
+    profit_loss = np.zeros((n_assets, n_dates), dtype=np.float64)
+    has_profit_loss = np.zeros((n_assets, n_dates), dtype=np.bool_)
+    for i in prange(n_assets):
+        for k in range(market_rates_offsets[i], market_rates_offsets[i + 1] - time_horizon):
+            log_shift = np.float64(log_market_rates[k]) - np.float64(log_market_rates[k + time_horizon])
+            profit_loss[i, market_date_columns[k]] = asset_values[i] * math.expm1(log_shift * sqrt_time_horizon)
+            has_profit_loss[i, market_date_columns[k]] = True
+    return profit_loss, has_profit_loss
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _value_at_risk_kernel(profit_loss, has_profit_loss, rows):
+    """
+    JIT compiled value at risk of a portofolio. Sums the profit and loss of the portofolio assets on the dates all of them have a
+    profit and loss and interpolates between the second and third lowest total. With fewer than three shared dates there is no
+    VaR, nan is returned and the caller should check the number of shared dates.
+
+    Parameters
+    ------------
+    profit_loss: np.ndarray
+        profit and loss of shape (n_assets, n_dates) as given by :func:`_profit_loss_kernel`.
+    has_profit_loss: np.ndarray
+        dates with a profit and loss of shape (n_assets, n_dates) as given by :func:`_profit_loss_kernel`.
+    rows: np.ndarray
+        rows of the portofolio assets within profit_loss.
+
+    Returns
+    -----------
+    value_at_risk: float
+    n_shared_dates: int
+        number of dates on which all portofolio assets have a profit and loss.
+    """
+    n_dates = profit_loss.shape[1]
+
+    total_profit_loss = np.empty(n_dates, dtype=np.float64)
+    shared_dates = np.empty(n_dates, dtype=np.bool_)
+    for t in prange(n_dates):
+        total = 0.0
+        shared = True
+        for i in rows:
+            total += profit_loss[i, t]
+            shared = shared and has_profit_loss[i, t]
+        total_profit_loss[t] = total
+        shared_dates[t] = shared
+
+    shared_profit_loss = total_profit_loss[shared_dates]
+    if shared_profit_loss.shape[0] < 3:
+        return np.nan, shared_profit_loss.shape[0]
+
+    # only the second and third lowest results are needed, partitioning on both positions places them without any sort.
+    lowest_profit_loss = np.partition(shared_profit_loss, (1, 2))
+    return 0.4 * lowest_profit_loss[1] + 0.6 * lowest_profit_loss[2], shared_profit_loss.shape[0]
+
+def calculate_kernel_profit_loss(log_market_rates, market_rates_offsets, market_date_columns, asset_values, n_dates: int, time_horizon: int=1):
+    """
+    Run the JIT compiled profit and loss kernel. The first call compiles the kernel, which is cached on disk for following processes.
+    Parameters are equal to :func:`_profit_loss_kernel`, inputs are converted to contiguous arrays. float32 log market rates are kept
+    as is, numba compiles a separate specialization of the kernel for them on first use.
+    """
+    log_market_rates = np.ascontiguousarray(log_market_rates, dtype=np.float32 if log_market_rates.dtype == np.float32 else np.float64)
+    market_rates_offsets = np.ascontiguousarray(market_rates_offsets, dtype=np.intp)
+    market_date_columns = np.ascontiguousarray(market_date_columns, dtype=np.intp)
+    asset_values = np.ascontiguousarray(asset_values, dtype=np.float64)
+    return _profit_loss_kernel(log_market_rates, market_rates_offsets, market_date_columns, asset_values, int(n_dates), int(time_horizon))
+
+def calculate_kernel_value_at_risk(profit_loss, has_profit_loss, rows) -> tuple:
+    """
+    Run the JIT compiled value at risk kernel on the profit and loss of :func:`calculate_kernel_profit_loss`.
+    Parameters and the value_at_risk, n_shared_dates results are equal to :func:`_value_at_risk_kernel`.
+    """
+    return _value_at_risk_kernel(profit_loss, has_profit_loss, np.ascontiguousarray(rows, dtype=np.intp))